@@ -0,0 +1,109 @@
+"""
+startup_benchmark.py
+
+Startup benchmark for ia-templatizer.
+
+Runs the CLI on a one-row sheet with `python -X importtime` and measures the
+import time the tool adds on top of a bare interpreter (top-level imports that
+`python -c pass` does not already load, including lazy imports made while the
+sheet is processed). Exits with status 1 if the best run is over budget, or if
+any run imports a module that should only load on demand. The on-demand
+check alone also runs as part of the test suite (tests/test_startup.py).
+
+Usage:
+    python benchmarks/startup_benchmark.py [--runs N] [--budget-ms MS]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(REPO_ROOT, "ia-templatizer.py")
+TEMPLATE = os.path.join(REPO_ROOT, "templates", "sample-template_01.json")
+
+# Import-time budget for a plain one-template run, measured with -X importtime
+DEFAULT_BUDGET_MS = 25.0
+
+# Modules a plain run (no -E, no --fan-out, no derived-fields, known extension) must not import
+LAZY_MODULES = {"ia_templatizer.expand_directories", "ia_templatizer.expressions", "mimetypes", "concurrent.futures"}
+
+def parse_importtime(stderr):
+    # Returns (name, level, cumulative_us) for every "import time:" line
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name_field = line.split("|")
+        name = name_field.strip()
+        level = (len(name_field) - len(name_field.lstrip()) - 1) // 2
+        entries.append((name, level, int(cumulative)))
+    return entries
+
+def run_importtime(args):
+    # Bytecode caching stays on so runs measure a warm start, as in normal use
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime"] + args,
+        capture_output=True, text=True, cwd=REPO_ROOT, env=env,
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stdout + result.stderr)
+        sys.exit(f"Command failed: {' '.join(args)}")
+    return parse_importtime(result.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description="Check ia-templatizer startup import time against a budget.")
+    parser.add_argument("--runs", type=int, default=20, help="number of runs; the best one is checked")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="import-time budget in milliseconds")
+    args = parser.parse_args()
+
+    interpreter_modules = {name for name, _, _ in run_importtime(["-c", "pass"])}
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        csv_path = os.path.join(tmpdir, "input.csv")
+        output_path = os.path.join(tmpdir, "output.csv")
+        with open(csv_path, "w", encoding="utf-8") as f:
+            f.write("file,title,date\nteam1.jpg,Team photo,2020-05-01\n")
+
+        cli_args = [SCRIPT, TEMPLATE, csv_path, output_path]
+        # Warm-up run writes the bytecode cache
+        run_importtime(cli_args)
+
+        best_import_us = None
+        best_wall = None
+        eager = set()
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            entries = run_importtime(cli_args)
+            wall = time.perf_counter() - start
+
+            tool_entries = [e for e in entries if e[1] == 0 and e[0] not in interpreter_modules]
+            import_us = sum(cumulative for _, _, cumulative in tool_entries)
+            if best_import_us is None or import_us < best_import_us:
+                best_import_us = import_us
+            if best_wall is None or wall < best_wall:
+                best_wall = wall
+
+            eager.update(LAZY_MODULES.intersection(name for name, _, _ in entries))
+
+    import_ms = best_import_us / 1000
+    print(f"Best of {args.runs}: {import_ms:.1f} ms import time (budget {args.budget_ms:.1f} ms), {best_wall * 1000:.1f} ms wall")
+
+    failed = False
+    if eager:
+        print(f"FAIL: plain run imported on-demand modules: {', '.join(sorted(eager))}")
+        failed = True
+    if import_ms > args.budget_ms:
+        print(f"FAIL: import time over budget by {import_ms - args.budget_ms:.1f} ms")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
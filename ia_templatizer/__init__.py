@@ -0,0 +1 @@
+"""IA Templatizer: apply a metadata template (JSON) to a CSV file for Internet Archive workflows."""
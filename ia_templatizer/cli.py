@@ -0,0 +1,51 @@
+import os
+import sys
+from .templatizer import apply_templates
+
+def parse_args(argv):
+    allowed_flags = {'--expand-directories', '-E', '--fan-out', '-F'}
+    flags = []
+    fan_out_pairs = []
+    positional = []
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg in ('--fan-out', '-F'):
+            if i + 2 >= len(argv):
+                print(f"Error: '{arg}' requires <template_path> <output_path>")
+                sys.exit(1)
+            fan_out_pairs.append((argv[i + 1], argv[i + 2]))
+            i += 3
+            continue
+        if arg.startswith('-'):
+            if arg not in allowed_flags:
+                print(f"Error: Unknown flag '{arg}'")
+                print(f"Allowed flags: {', '.join(sorted(allowed_flags))}")
+                sys.exit(1)
+            flags.append(arg)
+        else:
+            positional.append(arg)
+        i += 1
+
+    if len(positional) != 3:
+        prog = os.path.basename(sys.argv[0]) or "ia-templatizer"
+        print(f"Usage: {prog} [flags] <template_path> <csv_path> <output_path>")
+        sys.exit(1)
+    return flags, positional, fan_out_pairs
+
+def main():
+    flags, positional, fan_out_pairs = parse_args(sys.argv[1:])
+    template_path, csv_path, output_path = positional
+    expand_dirs = '--expand-directories' in flags or '-E' in flags
+
+    template_output_pairs = [(template_path, output_path)] + fan_out_pairs
+    try:
+        output_paths = apply_templates(csv_path, template_output_pairs, expand_dirs)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    for path in output_paths:
+        print(f"Output written to '{path}'")
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,10 @@ import os
 import warnings
 import re
 
+DATE_PATTERN = re.compile(r"^\d{2}[0-9x]{2}(-[0-9x]{2}){0,2}$")
+URL_PATTERN = re.compile(r"^https?://[^\s]+$")
+# Shared by template.py, identifier.py and templatizer.py
+
 def load_csv(csv_path):
     if not os.path.exists(csv_path):
         raise FileNotFoundError(f"CSV file '{csv_path}' does not exist.")
@@ -27,12 +31,10 @@ def write_output_csv(output_path, output_data, fieldnames):
 def is_valid_date(val):
     if not isinstance(val, str):
         return False
-    pattern = r"^\d{2}[0-9x]{2}(-[0-9x]{2}){0,2}$"
-    return bool(re.match(pattern, val))
+    return bool(DATE_PATTERN.match(val))
 
 def is_valid_url(url):
-    url_pattern = r"^https?://[^\s]+$"
-    return isinstance(url, str) and bool(re.match(url_pattern, url))
+    return isinstance(url, str) and bool(URL_PATTERN.match(url))
 
 def validate_csv(csv_data):
     if not csv_data:
@@ -52,7 +54,7 @@ def validate_csv(csv_data):
 
     # Validate rights-statement
     if 'rights-statement' in csv_data[0]:
-        from fields import is_valid_rights_statement
+        from .fields import is_valid_rights_statement
         for row in csv_data:
             if not is_valid_rights_statement(row['rights-statement']):
                 warnings.warn(f"Invalid rights statement '{row['rights-statement']}' in CSV.")
@@ -73,7 +75,7 @@ def validate_csv(csv_data):
 
     # Validate licenseurl
     if 'licenseurl' in csv_data[0]:
-        from fields import is_valid_licenseurl
+        from .fields import is_valid_licenseurl
         for row in csv_data:
             if not is_valid_licenseurl(row['licenseurl']):
                 warnings.warn(f"Invalid license URL '{row['licenseurl']}' in CSV.")
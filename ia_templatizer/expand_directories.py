@@ -1,8 +1,8 @@
 import os
 import csv
-from identifier import generate_identifier
-from fields import get_repeatable_fields, detect_mediatype, normalize_rights_statement_field
-from csvutils import dedupe_preserve_order
+from .identifier import generate_identifier
+from .fields import get_repeatable_fields, detect_mediatype, normalize_rights_statement_field
+from .csvutils import dedupe_preserve_order
 
 def is_valid_file(filename):
     basename = os.path.basename(filename)
@@ -48,7 +48,7 @@ def get_repeatable_input(row, field):
                 del row[k]
     return vals
 
-def write_expanded_csv(base_output_path, directory_path, template, row):
+def write_expanded_csv(base_output_path, directory_path, template, row, derived_fields=None):
     dir_name = os.path.basename(os.path.normpath(directory_path))
     base, ext = os.path.splitext(base_output_path)
     expanded_output_path = f"{base}_{dir_name}{ext}"
@@ -58,7 +58,8 @@ def write_expanded_csv(base_output_path, directory_path, template, row):
     existing_identifiers = set()
 
     control_fields = {
-        "identifier-date", "identifier_prefix", "identifier-prefix", "identifier_basename"
+        "identifier-date", "identifier_prefix", "identifier-prefix", "identifier_basename",
+        "derived-fields"
     }
 
     non_repeatable_fields = {
@@ -68,6 +69,13 @@ def write_expanded_csv(base_output_path, directory_path, template, row):
     }.union(control_fields)
     repeatable_fields = get_repeatable_fields(template, non_repeatable_fields)
     repeatable_field_values = {field: template[field] for field in repeatable_fields}
+    if derived_fields is None:
+        derived_fields = []
+        if 'derived-fields' in template:
+            from .expressions import compile_derived_fields
+            derived_fields = compile_derived_fields(template)
+    if derived_fields:
+        from .expressions import apply_derived_fields
 
     for file_path in files:
         new_row = row.copy()
@@ -81,6 +89,9 @@ def write_expanded_csv(base_output_path, directory_path, template, row):
             if field not in new_row or not new_row[field]:
                 new_row[field] = value
 
+        if derived_fields:
+            apply_derived_fields(new_row, derived_fields, template)
+
         # Mediatype detection logic (matches main script)
         if template.get('mediatype', '').upper() == 'DETECT':
             detected_type = detect_mediatype(new_row['file'])
@@ -0,0 +1,268 @@
+import os
+import re
+from .fields import normalize_rights_statement_field
+
+# Derived-field expressions
+#
+# A template may contain a "derived-fields" control field mapping output fields
+# to expression strings, e.g.
+#
+#   "derived-fields": {
+#       "title": "Men's Lacrosse, {date|year}: {file|stem}",
+#       "identifier": "{file|dirname|basename}-{file|stem|lower}"
+#   }
+#
+# Text outside braces is copied as-is ("{{" and "}}" produce literal braces).
+# Inside braces: one or more field references separated by commas, followed by
+# zero or more "|"-separated filters. Expressions are parsed once per template
+# into plain Python callables that take a row and return a string.
+
+TOKEN_PATTERN = re.compile(r"""\s*(?:
+    (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+  | (?P<int>-?\d+)
+  | (?P<name>[A-Za-z_][\w\-\[\]]*)
+  | (?P<op>[|,()])
+)""", re.VERBOSE)
+DATE_PARTS_PATTERN = re.compile(r"^(\d{2}[0-9x]{2})(?:-([0-9x]{2}))?(?:-([0-9x]{2}))?")
+LIST_SEPARATOR = "; "
+
+def _each(func):
+    # Apply a string function to a value or to every item of a list value
+    def apply(value):
+        if isinstance(value, list):
+            return [func(v) for v in value]
+        return func(value)
+    return apply
+
+def _date_part(index):
+    def part(value):
+        match = DATE_PARTS_PATTERN.match(value)
+        if not match:
+            return ''
+        return match.group(index) or ''
+    return _each(part)
+
+def _regex_filter(pattern, group=None):
+    if not isinstance(pattern, str):
+        raise ValueError(f"regex pattern must be a quoted string. Got {pattern!r}.")
+    try:
+        compiled = re.compile(pattern)
+    except re.error as e:
+        raise ValueError(f"Invalid regex '{pattern}' in derived field expression: {e}")
+    if group is None:
+        group = 1 if compiled.groups else 0
+    if isinstance(group, int):
+        if not 0 <= group <= compiled.groups:
+            raise ValueError(f"Regex '{pattern}' has no group {group}.")
+    elif group not in compiled.groupindex:
+        raise ValueError(f"Regex '{pattern}' has no group named '{group}'.")
+
+    def capture(value):
+        match = compiled.search(value)
+        if not match:
+            return ''
+        return match.group(group) or ''
+    return _each(capture)
+
+def _join_filter(sep=LIST_SEPARATOR):
+    if not isinstance(sep, str):
+        raise ValueError(f"join separator must be a quoted string. Got {sep!r}.")
+
+    def join(value):
+        if isinstance(value, list):
+            return sep.join(v for v in value if v)
+        return value
+    return join
+
+# filter name → (factory, min args, max args)
+FILTERS = {
+    'basename': (lambda: _each(os.path.basename), 0, 0),
+    'dirname': (lambda: _each(os.path.dirname), 0, 0),
+    'stem': (lambda: _each(lambda v: os.path.splitext(os.path.basename(v))[0]), 0, 0),
+    'lower': (lambda: _each(str.lower), 0, 0),
+    'upper': (lambda: _each(str.upper), 0, 0),
+    'year': (lambda: _date_part(1), 0, 0),
+    'month': (lambda: _date_part(2), 0, 0),
+    'day': (lambda: _date_part(3), 0, 0),
+    'regex': (_regex_filter, 1, 2),
+    'join': (_join_filter, 0, 1),
+}
+
+def _tokenize(text):
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = TOKEN_PATTERN.match(text, pos)
+        if not match:
+            raise ValueError(f"Unexpected character '{text[pos:].strip()[:1]}' in derived field expression '{{{text}}}'.")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'string':
+            # Only the enclosing quote is unescaped so regex escapes pass through
+            value = value[1:-1].replace('\\' + value[0], value[0])
+        elif kind == 'int':
+            value = int(value)
+        tokens.append((kind, value))
+        pos = match.end()
+    return tokens
+
+def _parse_args(tokens, i, source):
+    # tokens[i] is the opening parenthesis
+    args = []
+    i += 1
+    if i < len(tokens) and tokens[i] == ('op', ')'):
+        return args, i + 1
+    while i < len(tokens):
+        kind, value = tokens[i]
+        if kind not in ('string', 'int'):
+            raise ValueError(f"Filter arguments must be quoted strings or integers in '{{{source}}}'.")
+        args.append(value)
+        i += 1
+        # Arguments are separated by single commas; no trailing comma
+        if i < len(tokens) and tokens[i] == ('op', ')'):
+            return args, i + 1
+        if i >= len(tokens) or tokens[i] != ('op', ','):
+            break
+        i += 1
+    if i >= len(tokens):
+        raise ValueError(f"Missing ')' in derived field expression '{{{source}}}'.")
+    raise ValueError(f"Expected ',' or ')' between filter arguments in '{{{source}}}'.")
+
+def _compile_placeholder(source):
+    tokens = _tokenize(source)
+    fields = []
+    i = 0
+    while i < len(tokens):
+        kind, value = tokens[i]
+        if kind != 'name':
+            raise ValueError(f"Expected a field name in derived field expression '{{{source}}}'.")
+        # Same normalization as CSV headers and template keys
+        fields.append(normalize_rights_statement_field(value.lower()))
+        i += 1
+        if i < len(tokens) and tokens[i] == ('op', ','):
+            i += 1
+            continue
+        break
+
+    filters = []
+    while i < len(tokens):
+        if tokens[i] != ('op', '|'):
+            raise ValueError(f"Expected '|' in derived field expression '{{{source}}}'.")
+        i += 1
+        if i >= len(tokens) or tokens[i][0] != 'name':
+            raise ValueError(f"Expected a filter name after '|' in derived field expression '{{{source}}}'.")
+        name = tokens[i][1]
+        i += 1
+        args = []
+        if i < len(tokens) and tokens[i] == ('op', '('):
+            args, i = _parse_args(tokens, i, source)
+        if name not in FILTERS:
+            raise ValueError(f"Unknown filter '{name}' in derived field expression. Allowed filters: {', '.join(FILTERS)}")
+        factory, min_args, max_args = FILTERS[name]
+        if not min_args <= len(args) <= max_args:
+            raise ValueError(f"Filter '{name}' takes {min_args}-{max_args} arguments, got {len(args)}.")
+        filters.append(factory(*args))
+
+    if not fields:
+        raise ValueError("Empty placeholder '{}' in derived field expression.")
+
+    def lookup(row, field):
+        value = row.get(field, '')
+        if isinstance(value, list):
+            return [v for v in value if isinstance(v, str)]
+        return value if isinstance(value, str) else ''
+
+    if len(fields) == 1:
+        field = fields[0]
+        def value_of(row):
+            return lookup(row, field)
+    else:
+        def value_of(row):
+            return [lookup(row, field) for field in fields]
+
+    def evaluate(row):
+        value = value_of(row)
+        for apply_filter in filters:
+            value = apply_filter(value)
+        if isinstance(value, list):
+            return LIST_SEPARATOR.join(v for v in value if v)
+        return value
+    return evaluate
+
+def _find_closing_brace(text, start):
+    # Skip over quoted filter arguments, which may themselves contain braces
+    quote = None
+    i = start
+    while i < len(text):
+        char = text[i]
+        if quote:
+            if char == '\\':
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char in ('"', "'"):
+            quote = char
+        elif char == '}':
+            return i
+        i += 1
+    return -1
+
+def compile_expression(text):
+    if not isinstance(text, str):
+        raise ValueError(f"Derived field expression must be a string. Got {text!r}.")
+    parts = []
+    literal = []
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if text.startswith('{{', i) or text.startswith('}}', i):
+            literal.append(char)
+            i += 2
+            continue
+        if char == '}':
+            raise ValueError(f"Unmatched '}}' in derived field expression '{text}'.")
+        if char == '{':
+            end = _find_closing_brace(text, i + 1)
+            if end == -1:
+                raise ValueError(f"Unmatched '{{' in derived field expression '{text}'.")
+            if literal:
+                parts.append(''.join(literal))
+                literal = []
+            parts.append(_compile_placeholder(text[i + 1:end]))
+            i = end + 1
+            continue
+        literal.append(char)
+        i += 1
+    if literal:
+        parts.append(''.join(literal))
+
+    if not parts:
+        return lambda row: ''
+    if len(parts) == 1:
+        part = parts[0]
+        if isinstance(part, str):
+            return lambda row: part
+        return part
+    return lambda row: ''.join(p if isinstance(p, str) else p(row) for p in parts)
+
+def compile_derived_fields(template):
+    # Returns a list of (field, callable) pairs, in template order
+    derived = template.get('derived-fields', {})
+    if not isinstance(derived, dict):
+        raise ValueError("Template 'derived-fields' must be an object mapping field names to expressions.")
+    return [(normalize_rights_statement_field(field.lower()), compile_expression(expr)) for field, expr in derived.items()]
+
+def apply_derived_fields(row, derived_fields, template=None):
+    # Expressions see the row with template defaults filled in for missing or
+    # empty fields, so template lists (e.g. subject) can be joined. A field is
+    # only derived when neither the row nor the template already provides it.
+    context = row
+    if template:
+        context = dict(row)
+        for field, value in template.items():
+            if not context.get(field):
+                context[field] = value
+    for field, evaluate in derived_fields:
+        if not context.get(field):
+            row[field] = context[field] = evaluate(context)
@@ -1,5 +1,12 @@
-import re
-import mimetypes
+# Extension → mediatype table. Covers the common cases without touching the
+# mimetypes database, which is slow to initialize on every invocation.
+MEDIATYPE_EXTENSIONS = {
+    **dict.fromkeys(['mp4', 'mov', 'avi', 'mkv', 'm4v', 'mpg', 'mpeg', 'webm'], 'movies'),
+    **dict.fromkeys(['mp3', 'wav', 'flac', 'aac', 'm4a', 'ogg', 'aif', 'aiff'], 'audio'),
+    **dict.fromkeys(['pdf', 'epub', 'txt', 'doc', 'docx', 'html', 'htm', 'csv'], 'texts'),
+    **dict.fromkeys(['zip', 'tar', 'gz', 'rar', 'json', 'xml', 'rtf'], 'software'),
+    **dict.fromkeys(['jpg', 'jpeg', 'png', 'gif', 'bmp', 'tiff', 'tif', 'svg', 'webp'], 'image'),
+}
 
 def get_repeatable_fields(template, non_repeatable_fields):
     return [k for k, v in template.items() if isinstance(v, list) and k not in non_repeatable_fields]
@@ -8,17 +15,10 @@ def detect_mediatype(filepath):
     if not filepath:
         return ""
     ext = filepath.lower().split('.')[-1]
-    if ext in ['mp4', 'mov', 'avi', 'mkv']:
-        return 'movies'
-    if ext in ['mp3', 'wav', 'flac', 'aac']:
-        return 'audio'
-    if ext in ['pdf', 'epub', 'txt', 'doc', 'docx']:
-        return 'texts'
-    if ext in ['zip', 'tar', 'gz', 'rar']:
-        return 'software'
-    if ext in ['jpg', 'jpeg', 'png', 'gif', 'bmp', 'tiff']:
-        return 'image'
-    # fallback to mimetypes
+    if ext in MEDIATYPE_EXTENSIONS:
+        return MEDIATYPE_EXTENSIONS[ext]
+    # fallback to mimetypes, imported only for extensions not in the table
+    import mimetypes
     mime, _ = mimetypes.guess_type(filepath)
     if mime:
         if mime.startswith('video'):
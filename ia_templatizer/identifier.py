@@ -1,10 +1,13 @@
 import os
 import re
 import time
+from .csvutils import DATE_PATTERN
+
+FILENAME_UNSAFE_PATTERN = re.compile(r'[^A-Za-z0-9\-_]')
 
 def sanitize_filename(filename):
     filename = filename.replace(' ', '_')
-    return re.sub(r'[^A-Za-z0-9\-_]', '', filename)
+    return FILENAME_UNSAFE_PATTERN.sub('', filename)
 
 def smart_truncate(identifier, max_length=80):
     if len(identifier) <= max_length:
@@ -16,8 +19,7 @@ def smart_truncate(identifier, max_length=80):
     return identifier[:max_length]
 
 def is_valid_date(val):
-    pattern = r"^\d{2}[0-9x]{2}(-[0-9x]{2}){0,2}$"
-    return isinstance(val, str) and bool(re.match(pattern, val))
+    return isinstance(val, str) and bool(DATE_PATTERN.match(val))
 
 def generate_identifier(row, template, identifier_date, existing_identifiers=None):
     if existing_identifiers is None:
@@ -1,7 +1,7 @@
 import json
 import os
-import re
 import warnings
+from .csvutils import DATE_PATTERN, URL_PATTERN
 
 def load_template(template_path):
     if not os.path.exists(template_path):
@@ -14,12 +14,10 @@ def load_template(template_path):
 def is_valid_date(val):
     if not isinstance(val, str):
         return False
-    pattern = r"^\d{2}[0-9x]{2}(-[0-9x]{2}){0,2}$"
-    return bool(re.match(pattern, val))
+    return bool(DATE_PATTERN.match(val))
 
 def is_valid_url(url):
-    url_pattern = r"^https?://[^\s]+$"
-    return isinstance(url, str) and bool(re.match(url_pattern, url))
+    return isinstance(url, str) and bool(URL_PATTERN.match(url))
 
 def validate_template(template):
     if "subject" not in template:
@@ -32,7 +30,7 @@ def validate_template(template):
 
     # Validate rights-statement
     if 'rights-statement' in template:
-        from fields import is_valid_rights_statement
+        from .fields import is_valid_rights_statement
         if not is_valid_rights_statement(template['rights-statement']):
             warnings.warn(f"Invalid rights statement '{template['rights-statement']}' in template.")
 
@@ -48,7 +46,7 @@ def validate_template(template):
 
     # Validate licenseurl
     if 'licenseurl' in template:
-        from fields import is_valid_licenseurl
+        from .fields import is_valid_licenseurl
         if not is_valid_licenseurl(template['licenseurl']):
             warnings.warn(f"Invalid license URL '{template['licenseurl']}' in template.")
 
@@ -56,4 +54,4 @@ def validate_template(template):
     if 'identifier-date' in template:
         val = template['identifier-date']
         if not (is_valid_date(val) or (isinstance(val, str) and val.upper() == "TRUE")):
-            warnings.warn("identifier-date must be a date in YYYY, YYYY-MM, or YYYY-MM-DD format, or the string 'TRUE'.")
\ No newline at end of file
+            warnings.warn("identifier-date must be a date in YYYY, YYYY-MM, or YYYY-MM-DD format, or the string 'TRUE'.")
@@ -0,0 +1,293 @@
+import os
+import warnings
+
+from .template import load_template
+from .csvutils import URL_PATTERN, load_csv, write_output_csv, dedupe_preserve_order
+from .identifier import generate_identifier
+from .fields import get_repeatable_fields, detect_mediatype, normalize_rights_statement_field, is_valid_rights_statement, is_valid_licenseurl
+
+CONTROL_FIELDS = {
+    "identifier-date", "identifier_prefix", "identifier-prefix", "identifier_basename",
+    "derived-fields"
+}
+
+def is_valid_url(url):
+    return bool(URL_PATTERN.match(url))
+
+def normalize_headers(headers):
+    # Lowercase and normalize rightsstatement → rights-statement
+    return [normalize_rights_statement_field(h.lower()) for h in headers]
+
+def normalize_template_fields(template):
+    # Lowercase all keys and normalize rightsstatement → rights-statement
+    norm_template = {}
+    for k, v in template.items():
+        norm_k = normalize_rights_statement_field(k.lower())
+        norm_template[norm_k] = v
+    return norm_template
+
+def validate_metadata_fields(metadata, context="row"):
+    rs_val = metadata.get('rights-statement', metadata.get('rightsstatement', ''))
+    if rs_val and not is_valid_rights_statement(rs_val):
+        warnings.warn(f"Warning: Invalid rights-statement URL '{rs_val}' in {context}")
+
+    lic_val = metadata.get('licenseurl', '')
+    if lic_val and not is_valid_licenseurl(lic_val):
+        warnings.warn(f"Warning: Invalid licenseurl '{lic_val}' in {context}")
+
+    incl_val = metadata.get('inclusive-language-statement', '')
+    if incl_val and not is_valid_url(incl_val):
+        warnings.warn(f"Warning: Invalid inclusive-language-statement URL '{incl_val}' in {context}")
+
+def compile_template_expressions(template):
+    # Derived-field expressions are only parsed (and their module imported) when present
+    if 'derived-fields' not in template:
+        return []
+    from .expressions import compile_derived_fields
+    return compile_derived_fields(template)
+
+def prepare_template(template_path):
+    # Load, normalize and validate a template once so it can be reused across rows.
+    # Returns the template and its compiled derived-field expressions.
+    template = load_template(template_path)
+    template = normalize_template_fields(template)
+    validate_metadata_fields(template, context="template")
+    return template, compile_template_expressions(template)
+
+def load_input(csv_path):
+    # Load CSV and normalize headers
+    csv_data = load_csv(csv_path)
+    if csv_data:
+        # Normalize headers for all rows
+        orig_headers = list(csv_data[0].keys())
+        norm_headers = normalize_headers(orig_headers)
+        for row in csv_data:
+            for orig, norm in zip(orig_headers, norm_headers):
+                if orig != norm:
+                    row[norm] = row.pop(orig)
+    return csv_data
+
+def build_output_rows(template, csv_data, output_path, expand_dirs=False, derived_fields=None):
+    # Input rows are left untouched; output_path is only used to name expanded directory sheets
+
+    # Control fields used for logic, not output (support both hyphen and underscore)
+    control_fields = CONTROL_FIELDS
+
+    # Non-repeatable fields (for repeatable field detection)
+    non_repeatable_fields = {
+        "identifier", "file", "mediatype", "color", "date", "licenseurl", "rights",
+        "rights-statement", "publisher", "summary", "ai-note", "ai-summary",
+        "title", "volume", "year", "issue"
+    }.union(control_fields)
+
+    repeatable_fields = get_repeatable_fields(template, non_repeatable_fields)
+    repeatable_field_values = {field: template[field] for field in repeatable_fields}
+    # Parse derived-field expressions once for the whole sheet
+    if derived_fields is None:
+        derived_fields = compile_template_expressions(template)
+    if derived_fields:
+        from .expressions import apply_derived_fields
+
+    if expand_dirs:
+        # Only pull in directory expansion when it is requested
+        from .expand_directories import write_expanded_csv
+
+    output_data = []
+    # Each template gets its own identifier namespace
+    existing_identifiers = set()
+
+    def get_repeatable_input(row, field):
+        n_keys = sorted([k for k in row.keys() if k.startswith(f"{field}[")], key=lambda x: int(x.split("[")[1].split("]")[0]))
+        vals = []
+        if n_keys:
+            for k in n_keys:
+                val = row[k]
+                if val:
+                    vals.append(val.strip() if isinstance(val, str) else val)
+            for k in n_keys:
+                del row[k]
+        else:
+            keys = [k for k in row.keys() if k.lower() == field or k.lower() == field + "s" or (field == "subject" and k.lower() == "keywords")]
+            for k in keys:
+                val = row[k]
+                if val:
+                    if isinstance(val, list):
+                        vals.extend([v.strip() for v in val if isinstance(v, str) and v.strip()])
+                    elif isinstance(val, str):
+                        vals.extend([v.strip() for v in val.split(";") if v.strip()])
+            for k in keys:
+                if k in row:
+                    del row[k]
+        return vals
+
+    for row in csv_data:
+        # Work on a copy so the same input rows can be routed through other templates
+        row = row.copy()
+        # Expanded directories derive values per file, so they get the row as it was before derivation
+        underived_row = row.copy() if expand_dirs and derived_fields else row
+        # Derive before repeatable expansion and validation, so derived values are
+        # validated and list fields can still be referenced by name
+        if derived_fields:
+            apply_derived_fields(row, derived_fields, template)
+        # All keys are already normalized to lowercase and rights-statement
+        # Expand all repeatable fields: template values first, then input values, deduped
+        for field in repeatable_fields:
+            template_vals = repeatable_field_values.get(field, [])
+            input_vals = get_repeatable_input(row, field)
+            all_vals = dedupe_preserve_order(list(template_vals) + input_vals)
+            for i, val in enumerate(all_vals):
+                row[f"{field}[{i}]"] = val
+
+        validate_metadata_fields(row, context="row")
+
+        file_val = row.get('file', '')
+        # We'll build fieldnames after collecting all output_data
+
+        # Directory expansion logic
+        if expand_dirs and file_val and os.path.isdir(file_val):
+            try:
+                os.listdir(file_val)
+                expanded = write_expanded_csv(output_path, file_val, template, underived_row, derived_fields)
+                if expanded:
+                    continue
+            except Exception:
+                pass
+
+            # Treat as normal "data" item if expansion failed or directory not listable
+            new_row = row.copy()
+            new_row['mediatype'] = 'data'
+            for field, value in template.items():
+                if field == "identifier":
+                    continue
+                if field in control_fields:
+                    continue
+                if field not in new_row or not new_row[field]:
+                    new_row[field] = value
+            for field in repeatable_fields:
+                template_vals = repeatable_field_values.get(field, [])
+                input_vals = get_repeatable_input(new_row, field)
+                all_vals = dedupe_preserve_order(list(template_vals) + input_vals)
+                for i, val in enumerate(all_vals):
+                    new_row[f"{field}[{i}]"] = val
+            for field in repeatable_fields:
+                if field in new_row and isinstance(new_row[field], list):
+                    del new_row[field]
+            for field in control_fields:
+                if field in new_row:
+                    del new_row[field]
+            identifier_date = template.get('identifier-date', '')
+            new_row['identifier'] = generate_identifier(new_row, template, identifier_date, existing_identifiers)
+            output_data.append(new_row)
+            continue
+
+        # Fill in missing fields from the template
+        new_row = row.copy()
+        for field, value in template.items():
+            if field == "identifier":
+                continue
+            if field in control_fields:
+                continue
+            if field not in new_row or not new_row[field]:
+                new_row[field] = value
+
+        # Special mediatype detection
+        if template.get('mediatype', '').upper() == 'DETECT':
+            file_val = new_row.get('file', '')
+            detected_type = detect_mediatype(file_val)
+            if not detected_type or (file_val and os.path.isdir(file_val)):
+                new_row['mediatype'] = 'data'
+            else:
+                new_row['mediatype'] = detected_type
+
+        for field in repeatable_fields:
+            template_vals = repeatable_field_values.get(field, [])
+            input_vals = get_repeatable_input(new_row, field)
+            all_vals = dedupe_preserve_order(list(template_vals) + input_vals)
+            for i, val in enumerate(all_vals):
+                new_row[f"{field}[{i}]"] = val
+
+        for field in repeatable_fields:
+            if field in new_row and isinstance(new_row[field], list):
+                del new_row[field]
+
+        for field in control_fields:
+            if field in new_row:
+                del new_row[field]
+
+        identifier_date = template.get('identifier-date', '')
+        new_row['identifier'] = generate_identifier(new_row, template, identifier_date, existing_identifiers)
+
+        output_data.append(new_row)
+
+    return output_data
+
+def build_fieldnames(output_data):
+    # Build fieldnames for output: identifier, file, mediatype, collection[n], title, date, creator, description, subject[n], extras
+    all_cols = set().union(*(row.keys() for row in output_data))
+    exclude_subject_keys = {"subject", "subjects", "keywords"}
+    exclude_collection_keys = {"collection", "collections"}
+
+    collection_n_cols = sorted(
+        [col for col in all_cols if col.startswith("collection[")],
+        key=lambda x: int(x.split("[")[1].split("]")[0])
+    )
+    subject_n_cols = sorted(
+        [col for col in all_cols if col.startswith("subject[")],
+        key=lambda x: int(x.split("[")[1].split("]")[0])
+    )
+    extra_cols = [
+        col for col in all_cols
+        if col not in {
+            "identifier", "file", "mediatype", "title", "date", "creator", "description"
+        }
+        and col not in CONTROL_FIELDS
+        and col.lower() not in exclude_subject_keys
+        and col.lower() not in exclude_collection_keys
+        and not col.startswith("subject[")
+        and not col.startswith("collection[")
+    ]
+
+    fieldnames = [
+        "identifier", "file", "mediatype"
+    ] + collection_n_cols + [
+        "title", "date", "creator", "description"
+    ] + subject_n_cols + extra_cols
+
+    return fieldnames
+
+def find_duplicate_outputs(output_paths):
+    # Two templates writing to the same file would interleave their rows
+    seen = set()
+    duplicates = []
+    for output_path in output_paths:
+        norm_path = os.path.abspath(output_path)
+        if norm_path in seen and output_path not in duplicates:
+            duplicates.append(output_path)
+        seen.add(norm_path)
+    return duplicates
+
+def apply_templates(csv_path, template_output_pairs, expand_dirs=False):
+    # Parse and normalize the input sheet once, route it through every template,
+    # then write the output sheets concurrently
+    duplicates = find_duplicate_outputs(output_path for _, output_path in template_output_pairs)
+    if duplicates:
+        raise ValueError(f"Output path(s) used more than once: {', '.join(duplicates)}")
+
+    templates = [(*prepare_template(template_path), output_path) for template_path, output_path in template_output_pairs]
+    csv_data = load_input(csv_path)
+
+    results = []
+    for template, derived_fields, output_path in templates:
+        output_data = build_output_rows(template, csv_data, output_path, expand_dirs, derived_fields)
+        results.append((output_path, output_data, build_fieldnames(output_data)))
+
+    if len(results) == 1:
+        write_output_csv(*results[0])
+    else:
+        # Only pay for the thread pool import when there is more than one output
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=len(results)) as executor:
+            futures = [executor.submit(write_output_csv, *result) for result in results]
+            for future in futures:
+                future.result()
+    return [output_path for output_path, _, _ in results]
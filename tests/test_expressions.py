@@ -0,0 +1,103 @@
+import pytest
+
+from ia_templatizer.expressions import compile_expression, compile_derived_fields, apply_derived_fields
+
+ROW = {
+    "file": "athletics/20mlax/mccormack.jpg",
+    "date": "2020-05-0x",
+    "title": "Men's Lacrosse",
+    "contributor": "Michael McCormack",
+    "empty": "",
+}
+
+@pytest.mark.parametrize("expression, expected", [
+    ("plain text", "plain text"),
+    ("{file}", "athletics/20mlax/mccormack.jpg"),
+    ("{file|basename}", "mccormack.jpg"),
+    ("{file|stem}", "mccormack"),
+    ("{file|dirname}", "athletics/20mlax"),
+    ("{file|dirname|basename|upper}", "20MLAX"),
+    ("{title|lower}", "men's lacrosse"),
+    ("{date|year}-{date|month}-{date|day}", "2020-05-0x"),
+    ("{file|regex('(\\d{2})mlax')}", "20"),
+    ("{file|regex('(?P<team>\\w+)/(\\w+)\\.jpg', 'team')}", "20mlax"),
+    ("{file|regex('(\\w+)\\.(jpg)', 2)}", "jpg"),
+    ("{file|regex('nomatch')}", ""),
+    ("{file|regex('(\\w+)\\.jpg' , 1 )}", "mccormack"),
+    ("{title,contributor|join()}", "Men's Lacrosse; Michael McCormack"),
+    ("{title,empty,contributor|join(': ')}", "Men's Lacrosse: Michael McCormack"),
+    ("{title,contributor}", "Men's Lacrosse; Michael McCormack"),
+    ("{missing}", ""),
+    ("{{literal}}", "{literal}"),
+    ("Men's Lacrosse, {date|year}: {file|stem}", "Men's Lacrosse, 2020: mccormack"),
+])
+def test_expression_values(expression, expected):
+    assert compile_expression(expression)(ROW) == expected
+
+@pytest.mark.parametrize("expression", [
+    "{",
+    "}",
+    "{}",
+    "{|lower}",
+    "{file lower}",
+    "{file|nope}",
+    "{file|regex}",
+    "{file|regex(1)}",
+    "{file|regex('(')}",
+    "{file|regex('(\\d)', -1)}",
+    "{file|regex('(\\d)', 2)}",
+    "{file|regex('(?P<a>\\d)', 'b')}",
+    "{file|join(1)}",
+    "{file|join(x)}",
+    "{file|join(', '}",
+    "{file|upper('x')}",
+    "{file|regex('a' 'b')}",
+    "{file|regex('.*', 0,)}",
+    "{file|regex('.*',)}",
+    "{file|join(,)}",
+    "{file|join(', ',, )}",
+])
+def test_invalid_expressions_fail_at_compile_time(expression):
+    with pytest.raises(ValueError):
+        compile_expression(expression)
+
+def test_derived_fields_must_be_an_object():
+    with pytest.raises(ValueError):
+        compile_derived_fields({"derived-fields": ["{file}"]})
+    with pytest.raises(ValueError):
+        compile_derived_fields({"derived-fields": {"title": 1}})
+
+def test_apply_derived_fields_uses_template_defaults():
+    template = {
+        "subject": ["Athletes", "NCAA"],
+        "creator": "Middlebury College",
+        "derived-fields": {
+            "Description": "{creator}: {subject|join(', ')}",
+            "title": "{file|stem}",
+            "notes": "{title|upper}",
+        },
+    }
+    derived_fields = compile_derived_fields(template)
+    row = {"file": "a/b.jpg", "title": ""}
+    apply_derived_fields(row, derived_fields, template)
+    assert row == {
+        "file": "a/b.jpg",
+        "title": "b",
+        "description": "Middlebury College: Athletes, NCAA",
+        "notes": "B",
+    }
+
+def test_apply_derived_fields_keeps_existing_values():
+    template = {"creator": "Template", "derived-fields": {"title": "{file}", "creator": "{file}"}}
+    row = {"file": "a.jpg", "title": "Given"}
+    apply_derived_fields(row, compile_derived_fields(template), template)
+    assert row == {"file": "a.jpg", "title": "Given"}
+
+def test_field_names_are_normalized_like_csv_headers():
+    template = {"derived-fields": {"rightsStatement": "{file}", "Notes": "{RightsStatement} / {RIGHTS_STATEMENT}"}}
+    derived_fields = compile_derived_fields(template)
+    assert [field for field, _ in derived_fields] == ["rights-statement", "notes"]
+    row = {"file": "http://rightsstatements.org/vocab/CNE/1.0/"}
+    apply_derived_fields(row, derived_fields)
+    assert row["rights-statement"] == row["file"]
+    assert row["notes"] == f"{row['file']} / {row['file']}"
@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATE = os.path.join(REPO_ROOT, "templates", "sample-template_01.json")
+
+# Modules that must only be imported when a run needs them
+LAZY_MODULES = {"ia_templatizer.expand_directories", "ia_templatizer.expressions", "mimetypes", "concurrent.futures"}
+
+RUN_AND_LIST_MODULES = """
+import runpy, sys
+sys.argv = [sys.argv[1]] + sys.argv[2:]
+try:
+    runpy.run_path(sys.argv[0], run_name="__main__")
+finally:
+    sys.stderr.write("\\n".join(sorted(sys.modules)))
+"""
+
+def imported_modules(*args):
+    result = subprocess.run(
+        [sys.executable, "-c", RUN_AND_LIST_MODULES, os.path.join(REPO_ROOT, "ia-templatizer.py")] + list(args),
+        capture_output=True, text=True, cwd=REPO_ROOT,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    return set(result.stderr.splitlines())
+
+def write_sheet(tmp_path):
+    csv_path = tmp_path / "input.csv"
+    csv_path.write_text("file,title,date\nteam1.jpg,Team photo,2020-05-01\n", encoding="utf-8")
+    return str(csv_path)
+
+def test_plain_run_does_not_import_on_demand_modules(tmp_path):
+    modules = imported_modules(TEMPLATE, write_sheet(tmp_path), str(tmp_path / "out.csv"))
+    assert "ia_templatizer.templatizer" in modules
+    assert LAZY_MODULES.isdisjoint(modules), LAZY_MODULES & modules
+
+def test_optional_modules_load_when_requested(tmp_path):
+    template = tmp_path / "derived.json"
+    template.write_text('{"subject": [], "derived-fields": {"description": "{file|stem}"}}', encoding="utf-8")
+    modules = imported_modules(
+        "-E", "-F", str(template), str(tmp_path / "out2.csv"),
+        TEMPLATE, write_sheet(tmp_path), str(tmp_path / "out.csv"),
+    )
+    assert LAZY_MODULES - {"mimetypes"} <= modules
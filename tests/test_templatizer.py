@@ -0,0 +1,159 @@
+import copy
+import csv
+import json
+
+import pytest
+
+from ia_templatizer import cli
+from ia_templatizer.templatizer import (
+    apply_templates, build_output_rows, compile_template_expressions, load_input, prepare_template,
+)
+
+INPUT_ROWS = [
+    {"file": "photos/team1.jpg", "title": "Team photo", "date": "2020-05-01", "subject": "Lacrosse; Teams"},
+    {"file": "photos/anderson.jpg", "title": "Nate Anderson", "date": "2020-05-02", "keywords": "Portraits"},
+    {"file": "docs/roster.pdf", "title": "Roster", "date": "2020", "subject": ""},
+]
+
+TEMPLATES = {
+    "a.json": {"identifier-prefix": "alpha", "mediatype": "DETECT", "collection": ["one"], "subject": ["Athletics"]},
+    "b.json": {"identifier-prefix": "beta", "collection": ["two", "three"], "subject": [],
+               "rights-statement": "http://rightsstatements.org/vocab/CNE/1.0/"},
+    "c.json": {"mediatype": "image", "subject": ["Athletics", "Lacrosse"], "creator": "Middlebury College"},
+}
+
+@pytest.fixture
+def workdir(tmp_path):
+    with open(tmp_path / "input.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["file", "title", "date", "subject", "keywords"])
+        writer.writeheader()
+        writer.writerows(INPUT_ROWS)
+    for name, template in TEMPLATES.items():
+        (tmp_path / name).write_text(json.dumps(template), encoding="utf-8")
+    return tmp_path
+
+def read_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+def test_fan_out_matches_separate_runs(workdir):
+    pairs = [(str(workdir / name), str(workdir / f"fan_{name}.csv")) for name in TEMPLATES]
+    assert apply_templates(str(workdir / "input.csv"), pairs) == [output for _, output in pairs]
+
+    for name in TEMPLATES:
+        single_output = str(workdir / f"single_{name}.csv")
+        apply_templates(str(workdir / "input.csv"), [(str(workdir / name), single_output)])
+        assert read_rows(workdir / f"fan_{name}.csv") == read_rows(single_output)
+
+def test_each_output_has_its_own_identifier_namespace(workdir):
+    # Two templates without a prefix produce the same identifiers; with a shared
+    # namespace the second output would get collision suffixes instead
+    (workdir / "plain1.json").write_text('{"subject": []}', encoding="utf-8")
+    (workdir / "plain2.json").write_text('{"subject": ["Other"]}', encoding="utf-8")
+    apply_templates(str(workdir / "input.csv"), [
+        (str(workdir / "plain1.json"), str(workdir / "out1.csv")),
+        (str(workdir / "plain2.json"), str(workdir / "out2.csv")),
+    ])
+    ids1 = [row["identifier"] for row in read_rows(workdir / "out1.csv")]
+    ids2 = [row["identifier"] for row in read_rows(workdir / "out2.csv")]
+    assert ids1 == ids2 == ["team1", "anderson", "roster"]
+
+def test_input_rows_are_not_modified(workdir):
+    csv_data = load_input(str(workdir / "input.csv"))
+    original = copy.deepcopy(csv_data)
+    for name in TEMPLATES:
+        template, derived_fields = prepare_template(str(workdir / name))
+        build_output_rows(template, csv_data, str(workdir / "out.csv"), False, derived_fields)
+        assert csv_data == original
+
+def test_repeated_output_paths_are_rejected_before_any_work(workdir, monkeypatch):
+    monkeypatch.chdir(workdir)
+    # The templates do not exist: the duplicate check must fail first
+    with pytest.raises(ValueError, match="more than once"):
+        apply_templates("input.csv", [("missing1.json", "out.csv"), ("missing2.json", "out.csv")])
+    with pytest.raises(ValueError, match="more than once"):
+        apply_templates("input.csv", [("missing1.json", "out.csv"), ("missing2.json", str(workdir / "sub" / ".." / "out.csv"))])
+    assert not (workdir / "out.csv").exists()
+
+def test_cli_reports_repeated_output_paths(workdir, monkeypatch, capsys):
+    monkeypatch.chdir(workdir)
+    monkeypatch.setattr("sys.argv", ["ia-templatizer", "-F", "b.json", "./out.csv", "a.json", "input.csv", "out.csv"])
+    with pytest.raises(SystemExit) as exc:
+        cli.main()
+    assert exc.value.code == 1
+    assert "used more than once" in capsys.readouterr().out
+    assert not (workdir / "out.csv").exists()
+
+@pytest.mark.parametrize("argv", [
+    ["-F"],
+    ["-F", "b.json"],
+    ["a.json", "input.csv", "out.csv", "-F", "b.json"],
+    ["--fan-out", "b.json"],
+])
+def test_cli_fan_out_requires_template_and_output(argv, capsys):
+    with pytest.raises(SystemExit) as exc:
+        cli.parse_args(argv)
+    assert exc.value.code == 1
+    assert "requires <template_path> <output_path>" in capsys.readouterr().out
+
+def test_cli_parses_fan_out_pairs():
+    flags, positional, fan_out_pairs = cli.parse_args(
+        ["-E", "-F", "b.json", "b.csv", "a.json", "--fan-out", "c.json", "c.csv", "in.csv", "a.csv"]
+    )
+    assert flags == ["-E"]
+    assert positional == ["a.json", "in.csv", "a.csv"]
+    assert fan_out_pairs == [("b.json", "b.csv"), ("c.json", "c.csv")]
+
+def derive_rows(template, rows, output_path, expand_dirs=False):
+    return build_output_rows(template, rows, output_path, expand_dirs, compile_template_expressions(template))
+
+def test_derived_values_feed_repeatable_expansion(tmp_path):
+    template = {"subject": ["Athletics"], "derived-fields": {"keywords": "{file|dirname|basename}; {title|lower}"}}
+    [row] = derive_rows(template, [{"file": "lacrosse/team1.jpg", "title": "Team"}], str(tmp_path / "out.csv"))
+    assert [row["subject[0]"], row["subject[1]"], row["subject[2]"]] == ["Athletics", "lacrosse", "team"]
+    assert "keywords" not in row
+
+def test_derived_list_fields_join_template_values(tmp_path):
+    template = {"subject": ["Athletics", "NCAA"], "derived-fields": {"description": "{subject|join(', ')}"}}
+    [row] = derive_rows(template, [{"file": "a.jpg"}], str(tmp_path / "out.csv"))
+    assert row["description"] == "Athletics, NCAA"
+
+def test_derived_values_are_validated(tmp_path):
+    template = {"subject": [], "derived-fields": {"licenseurl": "example.com/{file|stem}"}}
+    with pytest.warns(UserWarning, match="Invalid licenseurl 'example.com/a'"):
+        derive_rows(template, [{"file": "a.jpg"}], str(tmp_path / "out.csv"))
+
+def test_derived_values_are_used_for_identifiers(tmp_path):
+    template = {
+        "identifier-prefix": "pre",
+        "identifier-date": "TRUE",
+        "subject": [],
+        "derived-fields": {
+            "identifier": "{file|dirname|basename}-{file|stem}",
+            "date": "{file|regex('(\\d{4})')}",
+        },
+    }
+    [row] = derive_rows(template, [{"file": "2019/lacrosse/team1.jpg"}], str(tmp_path / "out.csv"))
+    assert row["date"] == "2019"
+    assert row["identifier"] == "pre_2019_lacrosse-team1"
+
+def test_expanded_directories_derive_per_file(tmp_path):
+    photos = tmp_path / "photos"
+    photos.mkdir()
+    (photos / "a.jpg").write_text("")
+    (photos / "b.mp3").write_text("")
+    template = {
+        "identifier-prefix": "pre",
+        "mediatype": "DETECT",
+        "subject": [],
+        "derived-fields": {"title": "{file|stem} ({date|year})", "notes": "{identifier-prefix}"},
+    }
+    rows = [{"file": str(photos), "date": "2001"}, {"file": str(photos / "a.jpg"), "date": "2002"}]
+    [main_row] = derive_rows(template, rows, str(tmp_path / "out.csv"), expand_dirs=True)
+    assert (main_row["title"], main_row["notes"]) == ("a (2002)", "pre")
+
+    expanded = sorted(read_rows(tmp_path / "out_photos.csv"), key=lambda r: r["file"])
+    assert [(r["title"], r["notes"], r["mediatype"]) for r in expanded] == [
+        ("a (2001)", "pre", "image"),
+        ("b (2001)", "pre", "audio"),
+    ]